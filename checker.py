@@ -6,27 +6,70 @@
 """
 
 import asyncio
+import codecs
+import json
 import logging
+import random
 import re
-from enum import Enum
+import string
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from enum import IntEnum
 from dataclasses import dataclass
-from typing import Optional
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Optional
 
 import aiohttp
+from aiolimiter import AsyncLimiter
+
+try:
+    # Быстрый C-парсер JSON, разбирает bytes без промежуточной str
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    # HTTP/2-клиент (опционально, см. TikTokChecker(http2=True))
+    import httpx
+except ImportError:
+    httpx = None
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
+# Разделители в текстовом отчёте
+REPORT_SEP_EQ = "═" * 40
+REPORT_SEP_DASH = "─" * 40
+
+
+class UsernameStatus(IntEnum):
+    """
+    Статусы юзернейма TikTok (подписи для отображения - в STATUS_LABEL).
+    
+    Значения начинаются с 1, чтобы любой статус был истинным в bool-контексте.
+    """
+    AVAILABLE = 1
+    TAKEN = 2
+    UNAVAILABLE = 3
+    ERROR = 4
+    
+    @property
+    def label(self) -> str:
+        """Подпись статуса для отображения (раньше хранилась в .value)."""
+        return STATUS_LABEL[self]
 
-class UsernameStatus(Enum):
-    """Статусы юзернейма TikTok."""
-    AVAILABLE = "✅ Доступен"
-    TAKEN = "❌ Занят"
-    UNAVAILABLE = "⚠️ Недоступен (забанен/недействителен)"
-    ERROR = "🔴 Ошибка проверки"
 
+# Подписи статусов для отображения пользователю
+STATUS_LABEL = {
+    UsernameStatus.AVAILABLE: "✅ Доступен",
+    UsernameStatus.TAKEN: "❌ Занят",
+    UsernameStatus.UNAVAILABLE: "⚠️ Недоступен (забанен/недействителен)",
+    UsernameStatus.ERROR: "🔴 Ошибка проверки",
+}
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class CheckResult:
     """Результат проверки юзернейма."""
     username: str
@@ -34,6 +77,24 @@ class CheckResult:
     message: Optional[str] = None
 
 
+@dataclass(slots=True)
+class _HTTPResponse:
+    """Ответ HTTP-клиента (aiohttp или httpx) в общем для чекера виде."""
+    status: int
+    content_length: Optional[int]
+    charset: Optional[str]
+    read: Callable[[], Awaitable[bytes]]
+    iter_chunks: Callable[[int], AsyncIterator[bytes]]
+
+
+class RetryableHTTPError(Exception):
+    """Ответ TikTok, при котором проверку имеет смысл повторить (429, 5xx)."""
+    
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
 class TikTokChecker:
     """
     Класс для проверки доступности TikTok юзернеймов.
@@ -45,55 +106,341 @@ class TikTokChecker:
     # URL для проверки профиля TikTok
     TIKTOK_USER_URL = "https://www.tiktok.com/@{username}"
     
-    # Регулярное выражение для валидации юзернейма
-    # TikTok юзернеймы: 2-24 символа, буквы, цифры, точки и подчёркивания
-    USERNAME_PATTERN = re.compile(r'^[a-zA-Z0-9_.]{2,24}$')
+    # === ПРИЗНАКИ В HTML-СТРАНИЦЕ ПРОФИЛЯ ===
+    # Все литералы в нижнем регистре, регистр игнорируется при поиске
+    
+    # Эти признаки ТОЧНО означают что юзернейм свободен
+    DEFINITE_NOT_FOUND = (
+        '"statuscode":10202',  # TikTok API код: пользователь не найден
+        '"statuscode": 10202',
+        '"status_code":10202',
+        '"status_code": 10202',
+        '"statusmsg":"user not exist"',
+        '"statusmsg": "user not exist"',
+        '"statusmsg":"user doesn\'t exist"',
+        '"errormsg":"user not exist"',
+    )
+    
+    # Данные профиля в JSON
+    PROFILE_INDICATORS = (
+        '"followercount"',
+        '"followingcount"',
+        '"heartcount"',
+        '"videocount"',
+        '"diggcount"',
+        '"follower_count"',
+        '"following_count"',
+        '"heart_count"',
+    )
+    
+    # Признаки забаненного аккаунта
+    BANNED_INDICATORS = (
+        "this account has been banned",
+        "account suspended",
+        "this account is suspended",
+        "this account was banned",
+        "account has been suspended",
+        "violates our community guidelines",
+        '"statuscode":10101',
+        '"status_code":10101',
+    )
+    
+    # Текстовые признаки "не найден" (менее надёжные)
+    TEXT_NOT_FOUND = (
+        "couldn't find this account",
+        "couldn't find this page",
+        "user not found",
+        "page not found",
+        "this account doesn't exist",
+        "user doesn't exist",
+    )
+    
+    # Поле uniqueId профиля в JSON страницы: "uniqueId", "uniqueid" и
+    # "unique_id" в любом регистре, с пробелом после двоеточия или без.
+    # Выражение одно на все юзернеймы, значение сравнивается отдельно
+    _UNIQUEID_RE = re.compile(r'"unique_?id": ?"([^"]{1,64})"', re.IGNORECASE)
+    
+    # Все статические группы признаков собраны в одно регулярное выражение
+    # с именованными группами, чтобы пройти по странице один раз.
+    # re.IGNORECASE избавляет от копирования всей страницы через content.lower()
+    _VERDICT_GROUPS = (
+        ("notfound", "|".join(map(re.escape, DEFINITE_NOT_FOUND))),
+        ("banned", "|".join(map(re.escape, BANNED_INDICATORS))),
+        ("profile", "|".join(map(re.escape, PROFILE_INDICATORS))),
+        ("textnotfound", "|".join(map(re.escape, TEXT_NOT_FOUND))),
+    )
+    _VERDICT_RE = re.compile(
+        "|".join(f"(?P<{name}>{pattern})" for name, pattern in _VERDICT_GROUPS),
+        re.IGNORECASE,
+    )
+    
+    # Правило валидации юзернейма TikTok: 2-24 символа, латинские буквы,
+    # цифры, точки и подчёркивания. translate удаляет допустимые символы,
+    # непустой остаток означает невалидный юзернейм
+    USERNAME_MIN_LENGTH = 2
+    USERNAME_MAX_LENGTH = 24
+    _USERNAME_INVALID_CHARS = str.maketrans("", "", string.ascii_letters + string.digits + "_.")
     
     # Максимальное количество одновременных запросов
     DEFAULT_CONCURRENT_LIMIT = 10
     
+    # Верхняя граница для concurrent_limit
+    MAX_CONCURRENT_LIMIT = 50
+    
     # Таймаут для HTTP-запросов (секунды)
     REQUEST_TIMEOUT = 15
     
     # Количество попыток при ошибке
     MAX_RETRIES = 3
     
-    # Задержка между попытками (секунды)
+    # Базовая задержка между попытками (секунды), растёт экспоненциально
     RETRY_DELAY = 2
     
-    def __init__(self, concurrent_limit: int = DEFAULT_CONCURRENT_LIMIT):
+    # Ошибки сети, после которых имеет смысл повторить запрос (таймаут
+    # обрабатывается отдельно). Остальные ошибки HTTP-клиента (неверный URL,
+    # редиректы и т.п.) не повторяем
+    RETRYABLE_ERRORS = (
+        aiohttp.ClientConnectionError,
+        aiohttp.ClientPayloadError,
+    ) + ((httpx.TransportError,) if httpx else ())
+    
+    # Все ошибки HTTP-клиентов
+    REQUEST_ERRORS = (aiohttp.ClientError,) + ((httpx.HTTPError,) if httpx else ())
+    
+    # Размер блока при потоковом чтении HTML-страницы (байты)
+    STREAM_CHUNK_SIZE = 16384
+    
+    # Максимальный объём HTML-страницы, который читаем для анализа (байты)
+    MAX_CONTENT_SIZE = 1024 * 1024
+    
+    # Сколько байт страницы запрашивать первым (Range) запросом
+    PARTIAL_CONTENT_SIZE = 64 * 1024
+    
+    # Максимальный размер ответа API, который имеет смысл разбирать (байты).
+    # Обычный ответ user/detail - несколько КБ, больше - это не JSON API
+    MAX_API_RESPONSE_SIZE = 256 * 1024
+    
+    # Ограничение частоты запросов к TikTok (token bucket): не более
+    # RATE_LIMIT запросов за RATE_PERIOD секунд
+    RATE_LIMIT = 20
+    RATE_PERIOD = 10
+    
+    # Время жизни закэшированного результата по статусу (секунды).
+    # Свободные юзернеймы быстро занимают, поэтому их кэшируем недолго.
+    # Статусы, которых нет в словаре (ERROR), не кэшируются.
+    CACHE_TTL = {
+        UsernameStatus.AVAILABLE: 10 * 60,
+        UsernameStatus.TAKEN: 60 * 60,
+        UsernameStatus.UNAVAILABLE: 24 * 60 * 60,
+    }
+    
+    # Максимальное число записей в кэше: при переполнении
+    # вытесняются давно не запрашивавшиеся юзернеймы (LRU)
+    CACHE_MAX_SIZE = 10_000
+    
+    # Заголовки для имитации браузера
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+        "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+        "Accept-Encoding": "gzip, deflate, br",
+        "Connection": "keep-alive",
+        "Upgrade-Insecure-Requests": "1",
+    }
+    
+    # Общие HTTP-сессии чекеров (по одной на event loop)
+    _shared_sessions: dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+    
+    # Общие HTTP/2-клиенты httpx (по одному на event loop)
+    _shared_http2_clients: dict[asyncio.AbstractEventLoop, "httpx.AsyncClient"] = {}
+    
+    def __init__(
+        self,
+        concurrent_limit: int = DEFAULT_CONCURRENT_LIMIT,
+        http2: bool = False
+    ):
         """
         Инициализация чекера.
         
         Args:
-            concurrent_limit: Максимальное количество одновременных запросов.
+            concurrent_limit: Максимальное количество одновременных запросов
+                (от 1 до MAX_CONCURRENT_LIMIT).
+            http2: Использовать httpx с HTTP/2 вместо aiohttp: все запросы
+                мультиплексируются в несколько соединений.
+                Требуется пакет httpx[http2].
         """
+        concurrent_limit = max(1, min(concurrent_limit, self.MAX_CONCURRENT_LIMIT))
         self._semaphore = asyncio.Semaphore(concurrent_limit)
-        self._session: Optional[aiohttp.ClientSession] = None
+        self._limiter = AsyncLimiter(self.RATE_LIMIT, self.RATE_PERIOD)
+        
+        if http2 and httpx is None:
+            logger.warning("Пакет httpx не установлен, HTTP/2 отключён - используется aiohttp")
+            http2 = False
+        self._http2 = http2
+        
+        # Кэш результатов: юзернейм -> (время проверки, результат).
+        # Порядок ключей - от давно запрошенных к недавним
+        self._cache: OrderedDict[str, tuple[float, CheckResult]] = OrderedDict()
+        
+        # Проверки, которые выполняются сейчас: юзернейм -> задача.
+        # Одновременные запросы одного юзернейма ждут одну и ту же задачу
+        self._inflight: dict[str, asyncio.Task] = {}
+        
+        # Статистика: сколько проверок решено через API, а сколько через HTML
+        self._api_resolved = 0
+        self._html_fallbacks = 0
     
     async def _get_session(self) -> aiohttp.ClientSession:
-        """Получение или создание HTTP-сессии."""
-        if self._session is None or self._session.closed:
-            # Заголовки для имитации браузера
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Connection": "keep-alive",
-                "Upgrade-Insecure-Requests": "1",
-            }
+        """
+        Получение или создание HTTP-сессии.
+        
+        Сессия общая для всех экземпляров чекера в рамках одного event loop,
+        поэтому пул соединений и DNS-кэш переиспользуются между проверками.
+        """
+        loop = asyncio.get_running_loop()
+        session = TikTokChecker._shared_sessions.get(loop)
+        
+        if session is None or session.closed:
+            # Забываем сессии уже закрытых event loop'ов
+            for stale_loop in [l for l in TikTokChecker._shared_sessions if l.is_closed()]:
+                del TikTokChecker._shared_sessions[stale_loop]
             
             timeout = aiohttp.ClientTimeout(total=self.REQUEST_TIMEOUT)
-            self._session = aiohttp.ClientSession(headers=headers, timeout=timeout)
+            
+            # Все запросы идут на один хост, поэтому держим соединения
+            # открытыми и кэшируем DNS, чтобы не повторять TCP/TLS-рукопожатие.
+            # Коннектор общий, лимит на хост - верхняя граница concurrent_limit,
+            # а конкретное ограничение задаёт семафор каждого экземпляра.
+            connector = aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=self.MAX_CONCURRENT_LIMIT,
+                keepalive_timeout=60,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True,
+                force_close=False,
+            )
+            
+            session = aiohttp.ClientSession(
+                headers=self.HEADERS,
+                timeout=timeout,
+                connector=connector,
+                read_bufsize=2 ** 16,
+            )
+            TikTokChecker._shared_sessions[loop] = session
         
-        return self._session
+        return session
+    
+    async def _get_http2_client(self) -> "httpx.AsyncClient":
+        """
+        Получение или создание общего HTTP/2-клиента httpx.
+        
+        Как и сессия aiohttp, клиент общий для всех экземпляров чекера
+        в рамках одного event loop.
+        """
+        loop = asyncio.get_running_loop()
+        client = TikTokChecker._shared_http2_clients.get(loop)
+        
+        if client is None or client.is_closed:
+            for stale_loop in [l for l in TikTokChecker._shared_http2_clients if l.is_closed()]:
+                del TikTokChecker._shared_http2_clients[stale_loop]
+            
+            # Заголовок Connection запрещён в HTTP/2
+            headers = {k: v for k, v in self.HEADERS.items() if k != "Connection"}
+            
+            client = httpx.AsyncClient(
+                http2=True,
+                headers=headers,
+                timeout=httpx.Timeout(self.REQUEST_TIMEOUT),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                follow_redirects=True,
+            )
+            TikTokChecker._shared_http2_clients[loop] = client
+        
+        return client
+    
+    @asynccontextmanager
+    async def _open(
+        self,
+        url: str,
+        headers: Optional[dict[str, str]] = None
+    ) -> AsyncIterator[_HTTPResponse]:
+        """
+        GET-запрос через выбранный HTTP-клиент с потоковым чтением ответа.
+        
+        Args:
+            url: Адрес запроса.
+            headers: Дополнительные заголовки.
+            
+        Yields:
+            Ответ, тело которого можно прочитать целиком или блоками.
+        """
+        # Токен берётся на каждый запрос (API, Range и повторная загрузка
+        # страницы), чтобы не превысить лимит запросов TikTok
+        await self._limiter.acquire()
+        
+        if self._http2:
+            client = await self._get_http2_client()
+            async with client.stream("GET", url, headers=headers) as response:
+                content_length = response.headers.get("Content-Length")
+                yield _HTTPResponse(
+                    status=response.status_code,
+                    content_length=int(content_length) if content_length and content_length.isdigit() else None,
+                    charset=response.charset_encoding,
+                    read=response.aread,
+                    iter_chunks=response.aiter_bytes,
+                )
+        else:
+            session = await self._get_session()
+            async with session.get(url, allow_redirects=True, headers=headers) as response:
+                yield _HTTPResponse(
+                    status=response.status,
+                    content_length=response.content_length,
+                    charset=response.charset,
+                    read=response.read,
+                    iter_chunks=response.content.iter_chunked,
+                )
     
     async def close(self) -> None:
-        """Закрытие HTTP-сессии."""
-        if self._session and not self._session.closed:
-            await self._session.close()
-            self._session = None
+        """
+        Закрытие общих HTTP-клиентов текущего event loop.
+        
+        Клиенты общие для всех экземпляров чекера, поэтому их закрытие
+        затрагивает и другие экземпляры (при следующем запросе будут
+        созданы новые).
+        """
+        loop = asyncio.get_running_loop()
+        session = TikTokChecker._shared_sessions.pop(loop, None)
+        if session and not session.closed:
+            await session.close()
+        
+        client = TikTokChecker._shared_http2_clients.pop(loop, None)
+        if client and not client.is_closed:
+            await client.aclose()
+    
+    @classmethod
+    async def aclose_all(cls) -> None:
+        """
+        Закрытие общих HTTP-клиентов при завершении работы.
+        
+        Закрываются клиенты текущего event loop, записи уже закрытых
+        event loop'ов удаляются.
+        """
+        loop = asyncio.get_running_loop()
+        for session_loop in list(cls._shared_sessions):
+            if session_loop is loop:
+                session = cls._shared_sessions.pop(session_loop)
+                if not session.closed:
+                    await session.close()
+            elif session_loop.is_closed():
+                del cls._shared_sessions[session_loop]
+        
+        for client_loop in list(cls._shared_http2_clients):
+            if client_loop is loop:
+                client = cls._shared_http2_clients.pop(client_loop)
+                if not client.is_closed:
+                    await client.aclose()
+            elif client_loop.is_closed():
+                del cls._shared_http2_clients[client_loop]
     
     def validate_username(self, username: str) -> bool:
         """
@@ -111,7 +458,10 @@ class TikTokChecker:
         # Удаляем @ в начале если есть
         clean_username = username.lstrip('@').strip()
         
-        return bool(self.USERNAME_PATTERN.match(clean_username))
+        return (
+            self.USERNAME_MIN_LENGTH <= len(clean_username) <= self.USERNAME_MAX_LENGTH
+            and not clean_username.translate(self._USERNAME_INVALID_CHARS)
+        )
     
     def clean_username(self, username: str) -> str:
         """
@@ -146,8 +496,49 @@ class TikTokChecker:
                 message="Неверный формат юзернейма (2-24 символа, буквы, цифры, _ и .)"
             )
         
+        # Повторная проверка в пределах TTL отдаётся из кэша
+        now = time.monotonic()
+        cached = self._cache.get(clean_name)
+        if cached is not None:
+            checked_at, result = cached
+            if now - checked_at < self.CACHE_TTL.get(result.status, 0):
+                self._cache.move_to_end(clean_name)
+                logger.debug(f"@{clean_name}: Результат из кэша ({result.status.name})")
+                return result
+            del self._cache[clean_name]
+        
+        # Если этот юзернейм уже проверяется - ждём тот же результат.
+        # shield не даёт отмене одного из ожидающих отменить проверку для остальных
+        task = self._inflight.get(clean_name)
+        if task is None:
+            task = asyncio.ensure_future(self._check_and_cache(clean_name))
+            self._inflight[clean_name] = task
+            task.add_done_callback(lambda _: self._inflight.pop(clean_name, None))
+        else:
+            logger.debug(f"@{clean_name}: Проверка уже выполняется, ожидаем результат")
+        
+        return await asyncio.shield(task)
+    
+    async def _check_and_cache(self, username: str) -> CheckResult:
+        """
+        Проверка юзернейма с сохранением результата в кэш.
+        
+        Args:
+            username: Очищенный юзернейм.
+            
+        Returns:
+            Результат проверки.
+        """
         async with self._semaphore:
-            return await self._check_with_retry(clean_name)
+            result = await self._check_with_retry(username)
+        
+        if result.status in self.CACHE_TTL:
+            self._cache[username] = (time.monotonic(), result)
+            self._cache.move_to_end(username)
+            if len(self._cache) > self.CACHE_MAX_SIZE:
+                self._cache.popitem(last=False)
+        
+        return result
     
     async def _check_with_retry(self, username: str) -> CheckResult:
         """
@@ -164,22 +555,30 @@ class TikTokChecker:
         for attempt in range(1, self.MAX_RETRIES + 1):
             try:
                 return await self._perform_check(username)
-            except aiohttp.ClientError as e:
-                last_error = e
-                logger.warning(
-                    f"Попытка {attempt}/{self.MAX_RETRIES} для @{username} не удалась: {e}"
-                )
-                
-                if attempt < self.MAX_RETRIES:
-                    await asyncio.sleep(self.RETRY_DELAY * attempt)
             except asyncio.TimeoutError:
                 last_error = "Таймаут запроса"
                 logger.warning(
                     f"Таймаут при проверке @{username}, попытка {attempt}/{self.MAX_RETRIES}"
                 )
-                
-                if attempt < self.MAX_RETRIES:
-                    await asyncio.sleep(self.RETRY_DELAY * attempt)
+            except (RetryableHTTPError, *self.RETRYABLE_ERRORS) as e:
+                last_error = e
+                logger.warning(
+                    f"Попытка {attempt}/{self.MAX_RETRIES} для @{username} не удалась: {e}"
+                )
+            except self.REQUEST_ERRORS as e:
+                # Повтор не поможет - сразу возвращаем ошибку
+                logger.error(f"Ошибка при проверке @{username}: {e}")
+                return CheckResult(
+                    username=username,
+                    status=UsernameStatus.ERROR,
+                    message=f"Ошибка запроса: {e}"
+                )
+            
+            if attempt < self.MAX_RETRIES:
+                # Экспоненциальная задержка со случайной добавкой,
+                # чтобы повторы из bulk-проверки не уходили одновременно
+                delay = self.RETRY_DELAY * 2 ** (attempt - 1) * (1 + random.random() * 0.25)
+                await asyncio.sleep(delay)
         
         logger.error(f"Все попытки проверки @{username} исчерпаны: {last_error}")
         return CheckResult(
@@ -202,27 +601,69 @@ class TikTokChecker:
         """
         logger.debug(f"Проверка юзернейма: @{username}")
         
-        # Сначала пробуем API проверку (более надёжная)
+        # Сначала пробуем API проверку (более надёжная).
+        # Если API дал однозначный ответ, тяжёлую HTML-страницу не скачиваем.
         api_result = await self._check_via_api(username)
         if api_result is not None:
+            self._api_resolved += 1
             return api_result
         
         # Fallback на HTML парсинг
+        self._html_fallbacks += 1
         logger.debug(f"@{username}: API недоступен, используем HTML парсинг")
         
-        session = await self._get_session()
+        # Сначала запрашиваем только начало страницы (Range): признаки статуса
+        # находятся в первых <script>. Если сервер игнорирует Range, ответ
+        # придёт целиком и будет прочитан с ранним выходом
+        status_code, content, found = await self._fetch_profile(
+            username, self.PARTIAL_CONTENT_SIZE
+        )
+        
+        if status_code in (206, 416):
+            if found:
+                status_code = 200
+            else:
+                # В начале страницы ответа нет - загружаем её целиком
+                logger.debug(f"@{username}: Начало страницы не дало ответа, загружаем целиком")
+                status_code, content, _ = await self._fetch_profile(username)
+        
+        # Анализ страницы - CPU-работа, выполняем в отдельном потоке,
+        # чтобы не блокировать event loop для остальных проверок
+        return await asyncio.to_thread(self._analyze_response, username, status_code, content)
+    
+    async def _fetch_profile(
+        self,
+        username: str,
+        max_bytes: Optional[int] = None
+    ) -> tuple[int, str, bool]:
+        """
+        Загрузка HTML-страницы профиля.
+        
+        Args:
+            username: Очищенный юзернейм.
+            max_bytes: Если указан - запрашиваются только первые max_bytes
+                байт страницы (заголовок Range).
+            
+        Returns:
+            HTTP статус, прочитанная страница и признак того,
+            что в ней найден однозначный ответ.
+        """
         url = self.TIKTOK_USER_URL.format(username=username)
+        headers = {"Range": f"bytes=0-{max_bytes - 1}"} if max_bytes else None
         
-        async with session.get(url, allow_redirects=True) as response:
+        async with self._open(url, headers) as response:
             status_code = response.status
             
             logger.debug(f"@{username}: HTTP статус {status_code}")
             
-            # Получаем контент для анализа
-            content = await response.text()
+            # Rate-limit и ошибки сервера - временные, страницу не читаем
+            if status_code == 429 or status_code >= 500:
+                raise RetryableHTTPError(status_code)
             
-            # Анализируем ответ
-            return self._analyze_response(username, status_code, content)
+            # Получаем контент для анализа (с ранним выходом)
+            content, found = await self._read_content(response, username)
+        
+        return status_code, content, found
     
     async def _check_via_api(self, username: str) -> Optional[CheckResult]:
         """
@@ -234,60 +675,161 @@ class TikTokChecker:
             username: Очищенный юзернейм.
             
         Returns:
-            Результат проверки или None если API недоступен.
+            Результат проверки или None, если API недоступен
+            или ответ не позволяет однозначно определить статус.
         """
-        session = await self._get_session()
-        
         # TikTok API endpoint для проверки пользователя
         api_url = f"https://www.tiktok.com/api/user/detail/?uniqueId={username}&secUid="
         
         try:
-            async with session.get(api_url, allow_redirects=True) as response:
-                if response.status == 200:
-                    try:
-                        data = await response.json()
-                        
-                        # Проверяем статус код в ответе API
-                        status_code = data.get("statusCode", data.get("status_code", 0))
-                        
-                        # statusCode 0 = успех, пользователь существует
-                        if status_code == 0:
-                            user_info = data.get("userInfo", {})
-                            user = user_info.get("user", {})
-                            if user.get("uniqueId", "").lower() == username.lower():
-                                logger.info(f"@{username}: Занят (подтверждено через API)")
-                                return CheckResult(
-                                    username=username,
-                                    status=UsernameStatus.TAKEN,
-                                    message="Юзернейм занят (подтверждено через API)"
-                                )
-                        
-                        # statusCode 10202 = пользователь не существует
-                        if status_code == 10202:
-                            logger.info(f"@{username}: Доступен (подтверждено через API)")
-                            return CheckResult(
-                                username=username,
-                                status=UsernameStatus.AVAILABLE,
-                                message="Юзернейм свободен (подтверждено через API)"
-                            )
-                        
-                        # statusCode 10101 = аккаунт забанен
-                        if status_code == 10101:
-                            logger.info(f"@{username}: Забанен (подтверждено через API)")
-                            return CheckResult(
-                                username=username,
-                                status=UsernameStatus.UNAVAILABLE,
-                                message="Аккаунт забанен"
-                            )
-                            
-                    except Exception as e:
-                        logger.debug(f"Ошибка парсинга API ответа для @{username}: {e}")
+            async with self._open(api_url) as response:
+                if response.status != 200:
+                    logger.debug(f"@{username}: API вернул HTTP {response.status}")
+                    return None
+                
+                content_length = response.content_length
+                if content_length is not None and content_length > self.MAX_API_RESPONSE_SIZE:
+                    logger.debug(
+                        f"@{username}: Слишком большой ответ API ({content_length} байт)"
+                    )
+                    return None
+                
+                try:
+                    data = _json_loads(await response.read())
+                    return self._classify_api_response(username, data)
+                except Exception as e:
+                    logger.debug(f"Ошибка парсинга API ответа для @{username}: {e}")
                         
         except Exception as e:
             logger.debug(f"API проверка не удалась для @{username}: {e}")
         
         return None
     
+    def _classify_api_response(self, username: str, data: dict) -> Optional[CheckResult]:
+        """
+        Определение статуса юзернейма по JSON-ответу API.
+        
+        Args:
+            username: Очищенный юзернейм.
+            data: Разобранный JSON-ответ API.
+            
+        Returns:
+            Результат проверки или None, если statusCode не даёт
+            однозначного ответа (тогда нужен HTML fallback).
+        """
+        # Проверяем статус код в ответе API
+        status_code = data.get("statusCode", data.get("status_code", 0))
+        
+        # statusCode 0 = успех, пользователь существует
+        if status_code == 0:
+            user = (data.get("userInfo") or {}).get("user") or {}
+            if (user.get("uniqueId") or "").lower() == username.lower():
+                logger.info(f"@{username}: Занят (подтверждено через API)")
+                return CheckResult(
+                    username=username,
+                    status=UsernameStatus.TAKEN,
+                    message="Юзернейм занят (подтверждено через API)"
+                )
+            
+            # Пустой ответ без данных пользователя - типичный ответ
+            # TikTok на запрос без подписи, он ничего не говорит о статусе
+            logger.debug(f"@{username}: API вернул statusCode 0 без данных пользователя")
+            return None
+        
+        # statusCode 10202 = пользователь не существует
+        if status_code == 10202:
+            logger.info(f"@{username}: Доступен (подтверждено через API)")
+            return CheckResult(
+                username=username,
+                status=UsernameStatus.AVAILABLE,
+                message="Юзернейм свободен (подтверждено через API)"
+            )
+        
+        # statusCode 10101 = аккаунт забанен
+        if status_code == 10101:
+            logger.info(f"@{username}: Забанен (подтверждено через API)")
+            return CheckResult(
+                username=username,
+                status=UsernameStatus.UNAVAILABLE,
+                message="Аккаунт забанен"
+            )
+        
+        logger.debug(f"@{username}: Неизвестный statusCode API: {status_code}")
+        return None
+    
+    @classmethod
+    def _has_uniqueid(cls, text: str, username_lower: str) -> bool:
+        """
+        Проверка, есть ли в тексте uniqueId с данным юзернеймом.
+        
+        Args:
+            text: Фрагмент или вся HTML-страница.
+            username_lower: Очищенный юзернейм в нижнем регистре.
+            
+        Returns:
+            True, если uniqueId юзернейма найден (без учёта регистра).
+        """
+        return any(
+            match.group(1).lower() == username_lower
+            for match in cls._UNIQUEID_RE.finditer(text)
+        )
+    
+    async def _read_content(
+        self,
+        response: _HTTPResponse,
+        username: str
+    ) -> tuple[str, bool]:
+        """
+        Потоковое чтение HTML-страницы с ранним выходом.
+        
+        Страница читается блоками, чтение прекращается как только найден
+        однозначный признак (пользователь не найден или uniqueId профиля)
+        либо прочитано MAX_CONTENT_SIZE байт.
+        
+        Args:
+            response: HTTP-ответ.
+            username: Очищенный юзернейм.
+            
+        Returns:
+            Прочитанная (возможно, не полностью) страница и признак того,
+            что в ней найден однозначный ответ.
+        """
+        try:
+            decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(errors="ignore")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        
+        username_lower = username.lower()
+        parts = []
+        size = 0
+        found = False
+        # Хвост предыдущего блока, чтобы не пропустить признак на стыке блоков
+        tail = ""
+        
+        async for chunk in response.iter_chunks(self.STREAM_CHUNK_SIZE):
+            text = decoder.decode(chunk)
+            parts.append(text)
+            size += len(chunk)
+            
+            window = tail + text
+            if (
+                self._has_uniqueid(window, username_lower)
+                or any(m.lastgroup == "notfound" for m in self._VERDICT_RE.finditer(window))
+            ):
+                found = True
+                logger.debug(f"@{username}: Признак найден после {size} байт, прекращаем чтение")
+                break
+            
+            if size >= self.MAX_CONTENT_SIZE:
+                logger.debug(f"@{username}: Достигнут лимит {self.MAX_CONTENT_SIZE} байт")
+                break
+            
+            tail = window[-256:]
+        else:
+            parts.append(decoder.decode(b"", final=True))
+        
+        return "".join(parts), found
+    
     def _analyze_response(
         self, 
         username: str, 
@@ -308,9 +850,6 @@ class TikTokChecker:
         Returns:
             Результат с определённым статусом.
         """
-        content_lower = content.lower()
-        username_lower = username.lower()
-        
         # 404 - профиль не существует, юзернейм свободен
         if status_code == 404:
             logger.info(f"@{username}: Доступен (404)")
@@ -322,62 +861,47 @@ class TikTokChecker:
         
         # 200 - страница загружена, проверяем содержимое
         if status_code == 200:
+            # Один проход по странице: собираем найденные признаки,
+            # решение принимается по приоритету групп
+            not_found_match = None
+            found_indicators = set()
+            banned_found = False
+            text_not_found_match = None
+            
+            for match in self._VERDICT_RE.finditer(content):
+                group = match.lastgroup
+                if group == "notfound":
+                    # Высший приоритет - дальше можно не искать
+                    not_found_match = match
+                    break
+                if group == "profile":
+                    found_indicators.add(match.group(0).lower())
+                elif group == "banned":
+                    banned_found = True
+                elif text_not_found_match is None:
+                    text_not_found_match = match
+            
             # === ПРОВЕРКА НА "ПОЛЬЗОВАТЕЛЬ НЕ НАЙДЕН" ===
             # Эти признаки ТОЧНО означают что юзернейм свободен
-            definite_not_found = [
-                '"statuscode":10202',  # TikTok API код: пользователь не найден
-                '"statuscode": 10202',
-                '"status_code":10202',
-                '"status_code": 10202',
-                '"statusmsg":"user not exist"',
-                '"statusmsg": "user not exist"',
-                '"statusmsg":"user doesn\'t exist"',
-                '"errormsg":"user not exist"',
-            ]
-            
-            for indicator in definite_not_found:
-                if indicator.lower() in content_lower:
-                    logger.info(f"@{username}: Доступен (API код не найден: '{indicator}')")
-                    return CheckResult(
-                        username=username,
-                        status=UsernameStatus.AVAILABLE,
-                        message="Юзернейм свободен для регистрации"
-                    )
+            if not_found_match:
+                logger.info(f"@{username}: Доступен (API код не найден: '{not_found_match.group(0)}')")
+                return CheckResult(
+                    username=username,
+                    status=UsernameStatus.AVAILABLE,
+                    message="Юзернейм свободен для регистрации"
+                )
             
             # === ПРОВЕРКА НА СУЩЕСТВОВАНИЕ ПРОФИЛЯ ===
             # Ищем uniqueId в JSON-данных страницы
-            # Паттерны для поиска uniqueId
-            uniqueid_patterns = [
-                f'"uniqueid":"{username_lower}"',
-                f'"uniqueid": "{username_lower}"',
-                f'"unique_id":"{username_lower}"',
-                f'"unique_id": "{username_lower}"',
-                f'"uniqueId":"{username_lower}"',
-                f'"uniqueId": "{username_lower}"',
-            ]
-            
-            for pattern in uniqueid_patterns:
-                if pattern.lower() in content_lower:
-                    logger.info(f"@{username}: Занят (найден uniqueId в JSON)")
-                    return CheckResult(
-                        username=username,
-                        status=UsernameStatus.TAKEN,
-                        message="Юзернейм уже занят другим пользователем"
-                    )
-            
-            # Проверяем наличие данных профиля в JSON
-            profile_indicators = [
-                '"followercount"',
-                '"followingcount"', 
-                '"heartcount"',
-                '"videocount"',
-                '"diggcount"',
-                '"follower_count"',
-                '"following_count"',
-                '"heart_count"',
-            ]
+            if self._has_uniqueid(content, username.lower()):
+                logger.info(f"@{username}: Занят (найден uniqueId в JSON)")
+                return CheckResult(
+                    username=username,
+                    status=UsernameStatus.TAKEN,
+                    message="Юзернейм уже занят другим пользователем"
+                )
             
-            profile_score = sum(1 for ind in profile_indicators if ind in content_lower)
+            profile_score = len(found_indicators)
             
             # Если найдено 2+ признака профиля - аккаунт занят
             if profile_score >= 2:
@@ -389,45 +913,23 @@ class TikTokChecker:
                 )
             
             # === ПРОВЕРКА НА ЗАБАНЕННЫЙ АККАУНТ ===
-            banned_indicators = [
-                "this account has been banned",
-                "account suspended",
-                "this account is suspended",
-                "this account was banned",
-                "account has been suspended",
-                "violates our community guidelines",
-                '"statuscode":10101',
-                '"status_code":10101',
-            ]
-            
-            for indicator in banned_indicators:
-                if indicator.lower() in content_lower:
-                    logger.info(f"@{username}: Недоступен (забанен)")
-                    return CheckResult(
-                        username=username,
-                        status=UsernameStatus.UNAVAILABLE,
-                        message="Аккаунт забанен (юзернейм может стать доступен позже)"
-                    )
+            if banned_found:
+                logger.info(f"@{username}: Недоступен (забанен)")
+                return CheckResult(
+                    username=username,
+                    status=UsernameStatus.UNAVAILABLE,
+                    message="Аккаунт забанен (юзернейм может стать доступен позже)"
+                )
             
             # === ПРОВЕРКА ТЕКСТОВЫХ ПРИЗНАКОВ "НЕ НАЙДЕН" ===
             # Эти менее надёжные, проверяем в конце
-            text_not_found = [
-                "couldn't find this account",
-                "couldn't find this page",
-                "user not found",
-                "page not found",
-                "this account doesn't exist",
-                "user doesn't exist",
-            ]
-            
-            for indicator in text_not_found:
-                if indicator.lower() in content_lower:
-                    logger.info(f"@{username}: Доступен (текст не найден: '{indicator}')")
-                    return CheckResult(
-                        username=username,
-                        status=UsernameStatus.AVAILABLE,
-                        message="Юзернейм свободен для регистрации"
-                    )
+            if text_not_found_match:
+                logger.info(f"@{username}: Доступен (текст не найден: '{text_not_found_match.group(0)}')")
+                return CheckResult(
+                    username=username,
+                    status=UsernameStatus.AVAILABLE,
+                    message="Юзернейм свободен для регистрации"
+                )
             
             # === ПО УМОЛЧАНИЮ: СЧИТАЕМ ЗАНЯТЫМ ===
             # Если нет явных признаков что юзернейм свободен - считаем занятым
@@ -448,14 +950,6 @@ class TikTokChecker:
                 message="Доступ запрещён (возможно rate-limit)"
             )
         
-        if status_code >= 500:
-            logger.error(f"@{username}: Ошибка сервера TikTok ({status_code})")
-            return CheckResult(
-                username=username,
-                status=UsernameStatus.ERROR,
-                message=f"Ошибка сервера TikTok: {status_code}"
-            )
-        
         # Неизвестный статус - считаем занятым для безопасности
         logger.warning(f"@{username}: Неопределённый статус ({status_code}) - считаем занятым")
         return CheckResult(
@@ -464,51 +958,66 @@ class TikTokChecker:
             message=f"Неопределённый статус (HTTP {status_code}) - предположительно занят"
         )
     
-    async def check_bulk(self, usernames: list[str]) -> list[CheckResult]:
+    async def check_bulk(
+        self,
+        usernames: list[str],
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> list[CheckResult]:
         """
         Массовая проверка списка юзернеймов.
         
-        Использует последовательную проверку с задержкой для избежания
-        rate-limiting от TikTok.
+        Все проверки запускаются параллельно, количество одновременных
+        запросов ограничивается семафором внутри check_username.
         
         Args:
             usernames: Список юзернеймов для проверки.
+            progress_callback: Вызывается после каждой завершённой проверки
+                с аргументами (проверено, всего).
             
         Returns:
-            Список результатов проверки.
+            Список результатов проверки (в порядке входного списка).
         """
         if not usernames:
             return []
         
-        logger.info(f"Начинаем массовую проверку {len(usernames)} юзернеймов")
+        total = len(usernames)
+        logger.info(f"Начинаем массовую проверку {total} юзернеймов")
         
-        results = []
+        done = 0
         
-        # Последовательная проверка с задержкой между запросами
-        # чтобы избежать rate-limiting от TikTok
-        for i, username in enumerate(usernames):
+        async def check_one(username: str) -> CheckResult:
+            nonlocal done
             try:
-                result = await self.check_username(username)
-                results.append(result)
-                
+                return await self.check_username(username)
+            finally:
+                done += 1
                 # Логируем прогресс каждые 10 юзернеймов
-                if (i + 1) % 10 == 0:
-                    logger.info(f"Проверено {i + 1}/{len(usernames)} юзернеймов")
-                
-                # Задержка между запросами для избежания rate-limiting
-                # 0.5 секунды достаточно для избежания блокировки
-                if i < len(usernames) - 1:
-                    await asyncio.sleep(0.5)
-                    
-            except Exception as e:
-                logger.error(f"Исключение при проверке {username}: {e}")
-                results.append(CheckResult(
+                if done % 10 == 0:
+                    logger.info(f"Проверено {done}/{total} юзернеймов")
+                if progress_callback is not None:
+                    progress_callback(done, total)
+        
+        tasks = [asyncio.create_task(check_one(u)) for u in usernames]
+        raw_results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        results = []
+        for username, result in zip(usernames, raw_results):
+            if isinstance(result, BaseException):
+                logger.error(f"Исключение при проверке {username}: {result}")
+                result = CheckResult(
                     username=username,
                     status=UsernameStatus.ERROR,
-                    message=str(e)
-                ))
+                    message=str(result)
+                )
+            results.append(result)
         
         logger.info(f"Массовая проверка завершена: {len(results)} результатов")
+        # Счётчики общие для всего чекера (и одновременных bulk-проверок),
+        # поэтому выводим их как итог с момента запуска
+        logger.info(
+            f"Всего с момента запуска решено через API: {self._api_resolved}, "
+            f"через HTML fallback: {self._html_fallbacks}"
+        )
         
         return results
     
@@ -523,7 +1032,7 @@ class TikTokChecker:
         Returns:
             Отформатированная строка.
         """
-        return f"@{result.username}: {result.status.value}"
+        return f"@{result.username}: {STATUS_LABEL[result.status]}"
     
     @staticmethod
     def format_results_report(results: list[CheckResult]) -> str:
@@ -539,62 +1048,64 @@ class TikTokChecker:
         if not results:
             return "Нет результатов для отображения."
         
-        # Группируем результаты по статусу
-        available = [r for r in results if r.status == UsernameStatus.AVAILABLE]
-        taken = [r for r in results if r.status == UsernameStatus.TAKEN]
-        unavailable = [r for r in results if r.status == UsernameStatus.UNAVAILABLE]
-        errors = [r for r in results if r.status == UsernameStatus.ERROR]
-        
-        lines = [
-            "═" * 40,
-            "📊 ОТЧЁТ О ПРОВЕРКЕ ЮЗЕРНЕЙМОВ TIKTOK",
-            "═" * 40,
-            "",
-            f"📈 Всего проверено: {len(results)}",
-            f"✅ Доступных: {len(available)}",
-            f"❌ Занятых: {len(taken)}",
-            f"⚠️ Недоступных: {len(unavailable)}",
-            f"🔴 Ошибок: {len(errors)}",
-            "",
-        ]
-        
-        if available:
-            lines.append("─" * 40)
-            lines.append("✅ ДОСТУПНЫЕ ЮЗЕРНЕЙМЫ:")
-            lines.append("─" * 40)
-            for r in available:
-                lines.append(f"  • @{r.username}")
-            lines.append("")
-        
-        if taken:
-            lines.append("─" * 40)
-            lines.append("❌ ЗАНЯТЫЕ ЮЗЕРНЕЙМЫ:")
-            lines.append("─" * 40)
-            for r in taken:
-                lines.append(f"  • @{r.username}")
-            lines.append("")
-        
-        if unavailable:
-            lines.append("─" * 40)
-            lines.append("⚠️ НЕДОСТУПНЫЕ ЮЗЕРНЕЙМЫ:")
-            lines.append("─" * 40)
-            for r in unavailable:
-                lines.append(f"  • @{r.username} - {r.message or 'Забанен/недействителен'}")
-            lines.append("")
-        
-        if errors:
-            lines.append("─" * 40)
-            lines.append("🔴 ОШИБКИ ПРОВЕРКИ:")
-            lines.append("─" * 40)
-            for r in errors:
-                lines.append(f"  • @{r.username} - {r.message or 'Неизвестная ошибка'}")
-            lines.append("")
-        
-        lines.append("═" * 40)
-        lines.append("Конец отчёта")
-        lines.append("═" * 40)
-        
-        return "\n".join(lines)
+        # Группируем результаты по статусу за один проход
+        buckets = {status: [] for status in UsernameStatus}
+        for r in results:
+            buckets[r.status].append(r)
+        
+        available = buckets[UsernameStatus.AVAILABLE]
+        taken = buckets[UsernameStatus.TAKEN]
+        unavailable = buckets[UsernameStatus.UNAVAILABLE]
+        errors = buckets[UsernameStatus.ERROR]
+        
+        def section(title: str, lines) -> Iterator[str]:
+            yield REPORT_SEP_DASH
+            yield title
+            yield REPORT_SEP_DASH
+            yield from lines
+            yield ""
+        
+        def report_lines() -> Iterator[str]:
+            yield REPORT_SEP_EQ
+            yield "📊 ОТЧЁТ О ПРОВЕРКЕ ЮЗЕРНЕЙМОВ TIKTOK"
+            yield REPORT_SEP_EQ
+            yield ""
+            yield f"📈 Всего проверено: {len(results)}"
+            yield f"✅ Доступных: {len(available)}"
+            yield f"❌ Занятых: {len(taken)}"
+            yield f"⚠️ Недоступных: {len(unavailable)}"
+            yield f"🔴 Ошибок: {len(errors)}"
+            yield ""
+            
+            if available:
+                yield from section(
+                    "✅ ДОСТУПНЫЕ ЮЗЕРНЕЙМЫ:",
+                    (f"  • @{r.username}" for r in available)
+                )
+            
+            if taken:
+                yield from section(
+                    "❌ ЗАНЯТЫЕ ЮЗЕРНЕЙМЫ:",
+                    (f"  • @{r.username}" for r in taken)
+                )
+            
+            if unavailable:
+                yield from section(
+                    "⚠️ НЕДОСТУПНЫЕ ЮЗЕРНЕЙМЫ:",
+                    (f"  • @{r.username} - {r.message or 'Забанен/недействителен'}" for r in unavailable)
+                )
+            
+            if errors:
+                yield from section(
+                    "🔴 ОШИБКИ ПРОВЕРКИ:",
+                    (f"  • @{r.username} - {r.message or 'Неизвестная ошибка'}" for r in errors)
+                )
+            
+            yield REPORT_SEP_EQ
+            yield "Конец отчёта"
+            yield REPORT_SEP_EQ
+        
+        return "\n".join(report_lines())
 
 
 async def main():
@@ -617,8 +1128,16 @@ async def main():
             print(TikTokChecker.format_result(result))
         
     finally:
-        await checker.close()
+        await TikTokChecker.aclose_all()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        # Более быстрый event loop на libuv (опционально, не для Windows)
+        import uvloop
+        loop_factory = uvloop.new_event_loop
+    except ImportError:
+        loop_factory = None
+    
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(main())
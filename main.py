@@ -8,12 +8,16 @@ TikTok Username Checker Telegram Bot.
 """
 
 import asyncio
+import contextlib
+import io
 import logging
 import os
 import sys
-import tempfile
-from datetime import datetime
+import time
+import types
+from collections import Counter
 from pathlib import Path
+from typing import Any, Awaitable, BinaryIO, Callable
 
 # Загрузка переменных из .env файла
 from dotenv import load_dotenv
@@ -21,11 +25,13 @@ load_dotenv()
 
 from aiogram import Bot, Dispatcher, Router, F
 from aiogram.filters import Command, CommandStart
-from aiogram.types import Message, FSInputFile
+from aiogram.types import Message, BufferedInputFile
 from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
+from aiogram.exceptions import TelegramBadRequest, TelegramNetworkError, TelegramRetryAfter
+from aiolimiter import AsyncLimiter
 
-from checker import TikTokChecker, UsernameStatus
+from checker import STATUS_LABEL, TikTokChecker, UsernameStatus
 
 # Настройка логирования
 logging.basicConfig(
@@ -44,15 +50,21 @@ if not BOT_TOKEN:
     logger.error("❌ Переменная окружения BOT_TOKEN не установлена!")
     sys.exit(1)
 
+# Использовать HTTP/2 (httpx) для запросов к TikTok вместо aiohttp
+USE_HTTP2 = os.getenv("TIKTOK_HTTP2", "").strip().lower() in ("1", "true", "yes")
+
 # Создаём роутер для обработки сообщений
 router = Router(name="main")
 
-# Глобальный экземпляр чекера
+# Глобальный экземпляр чекера (создаётся в on_startup)
 checker: TikTokChecker | None = None
 
+# Защищает закрытие чекера от повторного вызова on_shutdown
+_shutdown_lock = asyncio.Lock()
+
 
-# Текстовые сообщения бота (на русском)
-MESSAGES = {
+# Текстовые сообщения бота (на русском), неизменяемый словарь
+MESSAGES = types.MappingProxyType({
     "start": """
 🔍 <b>TikTok Username Checker Bot</b>
 
@@ -81,6 +93,10 @@ MESSAGES = {
     
     "checking_bulk": "⏳ Начинаю массовую проверку {count} юзернеймов...\nЭто может занять некоторое время.",
     
+    "bulk_progress": "⏳ Массовая проверка: {done} из {total} юзернеймов...",
+    
+    "bulk_queued": "⏳ В очереди... Проверка начнётся, как только освободится место.",
+    
     "file_empty": "⚠️ Файл пуст или не содержит валидных юзернеймов.",
     
     "file_too_large": "⚠️ Файл слишком большой! Максимум {max_count} юзернеймов за раз.",
@@ -91,6 +107,8 @@ MESSAGES = {
     
     "error": "❌ Произошла ошибка при проверке. Попробуйте позже.",
     
+    "invalid_username": "⚠️ Неверный формат юзернейма (2-24 символа, буквы, цифры, _ и .)",
+    
     "bulk_complete": """
 ✅ <b>Массовая проверка завершена!</b>
 
@@ -103,39 +121,197 @@ MESSAGES = {
 
 📄 Подробный отчёт прикреплён к сообщению.
 """,
+})
+
+# Эмодзи статусов в ответе на одиночную проверку
+_STATUS_EMOJI = {
+    UsernameStatus.AVAILABLE: "✅",
+    UsernameStatus.TAKEN: "❌",
+    UsernameStatus.UNAVAILABLE: "⚠️",
+    UsernameStatus.ERROR: "🔴",
 }
 
 # Максимальное количество юзернеймов для массовой проверки
 MAX_BULK_COUNT = 500
 
+# Максимальный размер загружаемого файла (байты): с запасом больше, чем
+# нужно для MAX_BULK_COUNT строк, файлы крупнее отклоняются без скачивания
+MAX_UPLOAD_BYTES = 256 * 1024
+
+# Максимальное количество одновременно выполняемых массовых проверок
+MAX_BULK_JOBS = 4
+
+# Допустимые расширения загружаемых файлов (в нижнем регистре)
+_ALLOWED_EXTS = ('.txt',)
+
+# Шаблоны, которые используются на каждое сообщение, вынесены в отдельные
+# имена, а полностью статичные строки отформатированы заранее
+_CHECKING = MESSAGES["checking"]
+_CHECKING_BULK = MESSAGES["checking_bulk"]
+_BULK_PROGRESS = MESSAGES["bulk_progress"]
+_BULK_QUEUED = MESSAGES["bulk_queued"]
+_BULK_COMPLETE = MESSAGES["bulk_complete"]
+_FILE_TOO_LARGE = MESSAGES["file_too_large"].format(max_count=MAX_BULK_COUNT)
+
+# Общий лимит на массовые проверки всех пользователей: остальные ждут в очереди,
+# чтобы не раздувать число соединений и не упираться в лимиты TikTok
+_BULK_SEM = asyncio.Semaphore(MAX_BULK_JOBS)
+
+
+def _normalize_username(s: str, first_word: bool = False) -> str | None:
+    """
+    Приведение введённого юзернейма к виду для проверки.
+    
+    Убираются пробелы по краям и @ в начале. Остальные проверки формата
+    выполняет чекер, чтобы невалидные строки попали в отчёт.
+    
+    Args:
+        s: Строка из сообщения или файла.
+        first_word: Оставить только первое слово (для сообщений).
+        
+    Returns:
+        Юзернейм или None, если он короче 2 символов.
+    """
+    name = s.strip().lstrip('@').strip()
+    if first_word:
+        name = name.partition(' ')[0]
+    if len(name) < 2:
+        return None
+    return name
+
+
+def _parse_usernames(file: BinaryIO) -> list[str]:
+    """
+    Разбор загруженного файла со списком юзернеймов.
+    
+    Юзернеймы идут по одному на строку, строки с # пропускаются.
+    Дубликаты (без учёта регистра) убираются с сохранением порядка.
+    Разбор прекращается, как только юзернеймов больше MAX_BULK_COUNT.
+    
+    Файл читается построчно, поэтому целиком декодированная копия
+    содержимого в памяти не создаётся. Концы строк LF, CRLF и CR
+    распознаются одинаково.
+    
+    Args:
+        file: Открытый бинарный файл.
+        
+    Returns:
+        Список юзернеймов.
+    """
+    # Один проход: фильтруем строки и убираем дубликаты
+    seen = set()
+    usernames = []
+    text = io.TextIOWrapper(file, encoding='utf-8', errors='ignore', newline=None)
+    for raw_line in text:
+        line = raw_line.strip()
+        if not line or line[0] == '#':
+            continue
+        
+        clean_name = _normalize_username(line)
+        if clean_name is None:
+            continue
+        
+        key = clean_name.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        usernames.append(clean_name)
+        
+        if len(usernames) > MAX_BULK_COUNT:
+            break
+    
+    return usernames
+
+
+async def _safe_send(coro_factory: Callable[[], Awaitable[Any]], retries: int = 2) -> Any:
+    """
+    Выполнение запроса к Telegram с повтором при превышении лимита.
+    
+    При TelegramRetryAfter ждём столько, сколько просит Telegram, и повторяем
+    запрос, вместо того чтобы показывать пользователю ошибку.
+    
+    Args:
+        coro_factory: Функция без аргументов, создающая корутину запроса.
+        retries: Количество повторов после ответа RetryAfter.
+        
+    Returns:
+        Результат запроса.
+    """
+    for _ in range(retries):
+        try:
+            return await coro_factory()
+        except TelegramRetryAfter as e:
+            logger.warning("Лимит Telegram API, повтор через %s с", e.retry_after)
+            await asyncio.sleep(e.retry_after + 0.1)
+    return await coro_factory()
+
+
+async def _progress_updater(status_message: Message, queue: asyncio.Queue) -> None:
+    """
+    Обновление сообщения о прогрессе массовой проверки.
+    
+    Из очереди берётся только самое свежее значение прогресса,
+    промежуточные пропускаются. Частоту правок ограничивает собственный
+    ограничитель, так что одновременные проверки не замедляют друг друга.
+    
+    Args:
+        status_message: Сообщение, которое редактируется.
+        queue: Очередь с парами (проверено, всего).
+    """
+    # Правка не чаще раза в секунду: лимит Telegram API действует на чат,
+    # поэтому ограничитель у каждой проверки свой
+    edit_limiter = AsyncLimiter(1, 1)
+    
+    while True:
+        done, total = await queue.get()
+        while not queue.empty():
+            done, total = queue.get_nowait()
+        
+        async with edit_limiter:
+            try:
+                await _safe_send(lambda: status_message.edit_text(
+                    _BULK_PROGRESS.format(done=done, total=total)
+                ))
+            except TelegramBadRequest as e:
+                # Например, текст не изменился - не критично для прогресса
+                logger.debug("Не удалось обновить прогресс: %s", e)
+            except (TelegramNetworkError, TelegramRetryAfter) as e:
+                # Прогресс только для информации: сетевая ошибка или исчерпанные
+                # повторы RetryAfter не должны прерывать массовую проверку
+                logger.warning("Не удалось обновить прогресс: %s", e)
+
 
 @router.message(CommandStart())
 async def cmd_start(message: Message) -> None:
     """Обработчик команды /start."""
-    logger.info(f"Пользователь {message.from_user.id} запустил бота")
-    await message.answer(MESSAGES["start"], parse_mode=ParseMode.HTML)
+    logger.info("Пользователь %s запустил бота", message.from_user.id)
+    await _safe_send(lambda: message.answer(MESSAGES["start"], parse_mode=ParseMode.HTML))
 
 
 @router.message(Command("help"))
 async def cmd_help(message: Message) -> None:
     """Обработчик команды /help."""
-    await message.answer(MESSAGES["start"], parse_mode=ParseMode.HTML)
+    await _safe_send(lambda: message.answer(MESSAGES["start"], parse_mode=ParseMode.HTML))
 
 
 @router.message(F.document)
 async def handle_document(message: Message) -> None:
     """Обработчик загруженных файлов."""
-    global checker
-    
     document = message.document
     
-    # Проверяем тип файла
-    if not document.file_name or not document.file_name.endswith('.txt'):
-        await message.answer(MESSAGES["invalid_file_type"])
+    # Проверяем тип файла (без учёта регистра: .TXT тоже подходит)
+    file_name = document.file_name or ""
+    if not file_name.lower().endswith(_ALLOWED_EXTS):
+        await _safe_send(lambda: message.answer(MESSAGES["invalid_file_type"]))
+        return
+    
+    # Размер известен из сообщения - слишком большой файл даже не скачиваем
+    if document.file_size and document.file_size > MAX_UPLOAD_BYTES:
+        await _safe_send(lambda: message.answer(_FILE_TOO_LARGE))
         return
     
     logger.info(
-        f"Пользователь {message.from_user.id} загрузил файл: {document.file_name}"
+        "Пользователь %s загрузил файл: %s", message.from_user.id, document.file_name
     )
     
     try:
@@ -143,194 +319,171 @@ async def handle_document(message: Message) -> None:
         bot: Bot = message.bot
         file = await bot.get_file(document.file_id)
         
-        # Читаем содержимое файла
-        file_bytes = await bot.download_file(file.file_path)
-        content = file_bytes.read().decode('utf-8', errors='ignore')
-        
-        # Парсим юзернеймы (один на строку)
-        usernames = []
-        for line in content.splitlines():
-            username = line.strip()
-            if username and not username.startswith('#'):
-                # Удаляем @ в начале если есть
-                clean_name = username.lstrip('@').strip()
-                if clean_name and len(clean_name) >= 2:
-                    usernames.append(clean_name)
-        
-        # Убираем дубликаты, сохраняя порядок
-        seen = set()
-        unique_usernames = []
-        for u in usernames:
-            lower_u = u.lower()
-            if lower_u not in seen:
-                seen.add(lower_u)
-                unique_usernames.append(u)
-        
-        usernames = unique_usernames
+        # Читаем и разбираем содержимое файла в отдельном потоке,
+        # чтобы не блокировать event loop для других пользователей
+        file_buffer = io.BytesIO()
+        await bot.download_file(file.file_path, destination=file_buffer)
+        file_buffer.seek(0)
+        usernames = await asyncio.to_thread(_parse_usernames, file_buffer)
         
         if not usernames:
-            await message.answer(MESSAGES["file_empty"])
+            await _safe_send(lambda: message.answer(MESSAGES["file_empty"]))
             return
         
         if len(usernames) > MAX_BULK_COUNT:
-            await message.answer(
-                MESSAGES["file_too_large"].format(max_count=MAX_BULK_COUNT)
-            )
+            await _safe_send(lambda: message.answer(_FILE_TOO_LARGE))
             return
         
         # Отправляем уведомление о начале проверки
-        status_message = await message.answer(
-            MESSAGES["checking_bulk"].format(count=len(usernames)),
+        status_message = await _safe_send(lambda: message.answer(
+            _CHECKING_BULK.format(count=len(usernames)),
             parse_mode=ParseMode.HTML
-        )
+        ))
         
-        # Выполняем массовую проверку
-        if checker is None:
-            checker = TikTokChecker()
+        # Если все слоты заняты, сообщаем пользователю, что он в очереди
+        queued = _BULK_SEM.locked()
+        if queued:
+            await _safe_send(lambda: status_message.edit_text(_BULK_QUEUED))
         
-        results = await checker.check_bulk(usernames)
+        async with _BULK_SEM:
+            if queued:
+                await _safe_send(lambda: status_message.edit_text(
+                    _CHECKING_BULK.format(count=len(usernames)),
+                    parse_mode=ParseMode.HTML
+                ))
+            
+            # Выполняем массовую проверку, показывая прогресс
+            progress_queue: asyncio.Queue = asyncio.Queue()
+            updater = asyncio.create_task(_progress_updater(status_message, progress_queue))
+            try:
+                results = await checker.check_bulk(
+                    usernames,
+                    progress_callback=lambda done, total: progress_queue.put_nowait((done, total))
+                )
+            finally:
+                updater.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await updater
         
-        # Подсчитываем статистику
-        available_count = sum(1 for r in results if r.status == UsernameStatus.AVAILABLE)
-        taken_count = sum(1 for r in results if r.status == UsernameStatus.TAKEN)
-        unavailable_count = sum(1 for r in results if r.status == UsernameStatus.UNAVAILABLE)
-        error_count = sum(1 for r in results if r.status == UsernameStatus.ERROR)
+        # Подсчитываем статистику за один проход
+        counts = Counter(r.status for r in results)
+        available_count = counts[UsernameStatus.AVAILABLE]
+        taken_count = counts[UsernameStatus.TAKEN]
+        unavailable_count = counts[UsernameStatus.UNAVAILABLE]
+        error_count = counts[UsernameStatus.ERROR]
         
         # Генерируем отчёт
         report = TikTokChecker.format_results_report(results)
         
-        # Сохраняем отчёт во временный файл
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Отчёт небольшой, поэтому отправляем его из памяти без временного файла
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
         report_filename = f"tiktok_report_{timestamp}.txt"
+        report_bytes = report.encode('utf-8')
         
-        with tempfile.NamedTemporaryFile(
-            mode='w',
-            suffix='.txt',
-            delete=False,
-            encoding='utf-8'
-        ) as tmp_file:
-            tmp_file.write(report)
-            tmp_path = tmp_file.name
+        # Отправляем результаты
+        summary = _BULK_COMPLETE.format(
+            total=len(results),
+            available=available_count,
+            taken=taken_count,
+            unavailable=unavailable_count,
+            errors=error_count
+        )
+        await _safe_send(lambda: status_message.edit_text(summary, parse_mode=ParseMode.HTML))
         
-        try:
-            # Отправляем результаты
-            await status_message.edit_text(
-                MESSAGES["bulk_complete"].format(
-                    total=len(results),
-                    available=available_count,
-                    taken=taken_count,
-                    unavailable=unavailable_count,
-                    errors=error_count
-                ),
-                parse_mode=ParseMode.HTML
-            )
-            
-            # Отправляем файл с отчётом
-            report_file = FSInputFile(tmp_path, filename=report_filename)
-            await message.answer_document(
-                report_file,
-                caption="📄 Подробный отчёт о проверке юзернеймов"
-            )
-            
-        finally:
-            # Удаляем временный файл
-            try:
-                os.unlink(tmp_path)
-            except OSError:
-                pass
+        # Отправляем файл с отчётом
+        report_file = BufferedInputFile(report_bytes, filename=report_filename)
+        await _safe_send(lambda: message.answer_document(
+            report_file,
+            caption="📄 Подробный отчёт о проверке юзернеймов"
+        ))
         
         logger.info(
-            f"Массовая проверка для пользователя {message.from_user.id} завершена: "
-            f"{len(results)} юзернеймов"
+            "Массовая проверка для пользователя %s завершена: %d юзернеймов",
+            message.from_user.id, len(results)
         )
         
     except UnicodeDecodeError:
-        logger.error(f"Ошибка декодирования файла от пользователя {message.from_user.id}")
-        await message.answer(MESSAGES["file_error"])
-    except Exception as e:
-        logger.exception(f"Ошибка при обработке файла: {e}")
-        await message.answer(MESSAGES["error"])
+        logger.error("Ошибка декодирования файла от пользователя %s", message.from_user.id)
+        await _safe_send(lambda: message.answer(MESSAGES["file_error"]))
+    except Exception:
+        logger.exception("Ошибка при обработке файла")
+        await _safe_send(lambda: message.answer(MESSAGES["error"]))
 
 
 @router.message(F.text)
 async def handle_text(message: Message) -> None:
     """Обработчик текстовых сообщений (одиночная проверка юзернейма)."""
-    global checker
-    
-    text = message.text.strip()
-    
-    # Пропускаем команды
-    if text.startswith('/'):
-        return
-    
-    # Извлекаем юзернейм
-    username = text.lstrip('@').strip()
+    raw = message.text
     
-    if not username:
+    # Пропускаем команды до любой обработки текста
+    if raw is None or raw[:1] == '/':
         return
     
     # Если несколько слов - берём первое
-    if ' ' in username:
-        username = username.split()[0]
+    username = _normalize_username(raw, first_word=True)
+    if username is None:
+        await _safe_send(lambda: message.answer(MESSAGES["invalid_username"]))
+        return
     
-    logger.info(f"Пользователь {message.from_user.id} проверяет: @{username}")
+    logger.info("Пользователь %s проверяет: @%s", message.from_user.id, username)
     
     # Отправляем уведомление о начале проверки
-    status_message = await message.answer(
-        MESSAGES["checking"].format(username=username),
+    status_message = await _safe_send(lambda: message.answer(
+        _CHECKING.format(username=username),
         parse_mode=ParseMode.HTML
-    )
+    ))
     
     try:
-        # Создаём чекер если ещё не создан
-        if checker is None:
-            checker = TikTokChecker()
-        
         # Проверяем юзернейм
         result = await checker.check_username(username)
         
         # Формируем ответ
-        status_emoji = {
-            UsernameStatus.AVAILABLE: "✅",
-            UsernameStatus.TAKEN: "❌",
-            UsernameStatus.UNAVAILABLE: "⚠️",
-            UsernameStatus.ERROR: "🔴",
-        }
-        
-        emoji = status_emoji.get(result.status, "❓")
+        emoji = _STATUS_EMOJI.get(result.status, "❓")
         
         response = f"""
 {emoji} <b>Результат проверки</b>
 
 👤 <b>Юзернейм:</b> <code>@{result.username}</code>
-📊 <b>Статус:</b> {result.status.value}
+📊 <b>Статус:</b> {STATUS_LABEL[result.status]}
 """
         
         if result.message:
             response += f"\n💬 <b>Детали:</b> {result.message}"
         
-        await status_message.edit_text(response, parse_mode=ParseMode.HTML)
+        await _safe_send(lambda: status_message.edit_text(response, parse_mode=ParseMode.HTML))
         
-        logger.info(f"Результат для @{username}: {result.status.name}")
+        logger.info("Результат для @%s: %s", username, result.status.name)
         
-    except Exception as e:
-        logger.exception(f"Ошибка при проверке {username}: {e}")
-        await status_message.edit_text(MESSAGES["error"])
+    except Exception:
+        logger.exception("Ошибка при проверке %s", username)
+        await _safe_send(lambda: status_message.edit_text(MESSAGES["error"]))
 
 
 async def on_startup(bot: Bot) -> None:
     """Действия при запуске бота."""
+    global checker
+    
+    # Чекер создаётся один раз до начала обработки сообщений и
+    # используется всеми обработчиками (общий пул HTTP-соединений)
+    checker = TikTokChecker(http2=USE_HTTP2)
+    
     me = await bot.get_me()
-    logger.info(f"✅ Бот запущен: @{me.username} (ID: {me.id})")
+    logger.info("✅ Бот запущен: @%s (ID: %s)", me.username, me.id)
 
 
 async def on_shutdown(bot: Bot) -> None:
     """Действия при остановке бота."""
     global checker
     
-    if checker:
-        await checker.close()
-        checker = None
+    # Повторный вызов (например, второй сигнал во время остановки)
+    # дождётся первого и ничего не сделает
+    async with _shutdown_lock:
+        if checker is not None:
+            current, checker = checker, None
+            try:
+                await current.close()
+            except Exception:
+                logger.exception("Ошибка при закрытии HTTP-сессии чекера")
     
     logger.info("🛑 Бот остановлен")
 
@@ -365,9 +518,17 @@ async def main() -> None:
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        # Более быстрый event loop на libuv (опционально, не для Windows)
+        import uvloop
+        loop_factory = uvloop.new_event_loop
+    except ImportError:
+        loop_factory = None
+    
+    try:
+        with asyncio.Runner(loop_factory=loop_factory) as runner:
+            runner.run(main())
     except KeyboardInterrupt:
         logger.info("Бот остановлен пользователем")
-    except Exception as e:
-        logger.exception(f"Критическая ошибка: {e}")
+    except Exception:
+        logger.exception("Критическая ошибка")
         sys.exit(1)
@@ -0,0 +1,13 @@
+"""
+Общие настройки тестов.
+
+Модули бота лежат в корне репозитория, поэтому корень добавляется в sys.path.
+main.py при импорте требует BOT_TOKEN - для тестов задаётся фиктивный токен.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("BOT_TOKEN", "123456:test-token")
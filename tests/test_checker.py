@@ -0,0 +1,256 @@
+"""Тесты TikTokChecker: разбор страницы, потоковое чтение, кэш и объединение запросов."""
+
+import asyncio
+
+import pytest
+
+import checker
+from checker import CheckResult, TikTokChecker, UsernameStatus, _HTTPResponse
+
+
+@pytest.fixture
+def tiktok() -> TikTokChecker:
+    return TikTokChecker()
+
+
+def _fake_response(body: bytes, chunk_size: int) -> tuple[_HTTPResponse, list[int]]:
+    """Ответ, который отдаёт body блоками и запоминает число прочитанных блоков."""
+    reads = []
+
+    async def iter_chunks(_size: int):
+        for start in range(0, len(body), chunk_size):
+            reads.append(start)
+            yield body[start:start + chunk_size]
+
+    async def read() -> bytes:
+        return body
+
+    response = _HTTPResponse(
+        status=200,
+        content_length=len(body),
+        charset="utf-8",
+        read=read,
+        iter_chunks=iter_chunks,
+    )
+    return response, reads
+
+
+# === Разбор страницы ===
+
+@pytest.mark.parametrize("content, expected", [
+    ('{"statusCode":10202}', UsernameStatus.AVAILABLE),
+    ('{"uniqueId":"bob"}', UsernameStatus.TAKEN),
+    ('{"UniqueId": "Bob"}', UsernameStatus.TAKEN),
+    ('{"unique_id":"BOB"}', UsernameStatus.TAKEN),
+    ('{"followerCount":1,"heartCount":2}', UsernameStatus.TAKEN),
+    ("this account has been banned", UsernameStatus.UNAVAILABLE),
+    ("Couldn't find this account", UsernameStatus.AVAILABLE),
+    ("<html>ничего полезного</html>", UsernameStatus.TAKEN),
+])
+def test_analyze_response_verdicts(tiktok, content, expected):
+    assert tiktok._analyze_response("bob", 200, content).status is expected
+
+
+@pytest.mark.parametrize("content, expected", [
+    # Точный признак "не найден" важнее признаков профиля
+    ('{"followerCount":1,"heartCount":2,"statusCode":10202}', UsernameStatus.AVAILABLE),
+    # uniqueId важнее текстового "не найден" (например, из словаря переводов)
+    ('{"UniqueId":"Bob"} user not found', UsernameStatus.TAKEN),
+    # Два признака профиля важнее бана
+    ('{"followerCount":1,"videoCount":2} account suspended', UsernameStatus.TAKEN),
+    # Один признак профиля не перевешивает бан
+    ('{"followerCount":1} account suspended', UsernameStatus.UNAVAILABLE),
+    # Бан важнее текстового "не найден"
+    ("account suspended. page not found", UsernameStatus.UNAVAILABLE),
+])
+def test_analyze_response_priority(tiktok, content, expected):
+    assert tiktok._analyze_response("bob", 200, content).status is expected
+
+
+def test_uniqueid_of_other_user_is_ignored(tiktok):
+    result = tiktok._analyze_response("bob", 200, '{"uniqueId":"bobby"} user not found')
+    assert result.status is UsernameStatus.AVAILABLE
+
+
+@pytest.mark.parametrize("status_code, expected", [
+    (404, UsernameStatus.AVAILABLE),
+    (403, UsernameStatus.ERROR),
+    (302, UsernameStatus.TAKEN),
+])
+def test_analyze_response_status_codes(tiktok, status_code, expected):
+    assert tiktok._analyze_response("bob", status_code, "").status is expected
+
+
+# === Потоковое чтение ===
+
+def test_read_content_stops_after_verdict(tiktok):
+    body = b'{"uniqueId":"bob"}' + b"x" * (tiktok.STREAM_CHUNK_SIZE * 4)
+    response, reads = _fake_response(body, tiktok.STREAM_CHUNK_SIZE)
+
+    content, found = asyncio.run(tiktok._read_content(response, "bob"))
+
+    assert found
+    assert len(reads) == 1
+    assert content.startswith('{"uniqueId":"bob"}')
+
+
+def test_read_content_finds_verdict_across_chunk_boundary(tiktok):
+    needle = b'"statusCode":10202'
+    body = b"x" * (tiktok.STREAM_CHUNK_SIZE - 5) + needle + b"x" * tiktok.STREAM_CHUNK_SIZE
+    response, reads = _fake_response(body, tiktok.STREAM_CHUNK_SIZE)
+
+    _, found = asyncio.run(tiktok._read_content(response, "bob"))
+
+    assert found
+    assert len(reads) == 2
+
+
+def test_read_content_reads_whole_page_without_verdict(tiktok):
+    body = "<html>привет</html>".encode() * 3000
+    response, reads = _fake_response(body, tiktok.STREAM_CHUNK_SIZE)
+
+    content, found = asyncio.run(tiktok._read_content(response, "bob"))
+
+    assert not found
+    assert content == body.decode()
+
+
+# === Range-запрос и повторная загрузка ===
+
+def _patch_fetch(monkeypatch, tiktok, responses):
+    """Подменяет API и _fetch_profile, возвращает список вызовов (max_bytes)."""
+    calls = []
+
+    async def no_api(username):
+        return None
+
+    async def fetch_profile(username, max_bytes=None):
+        calls.append(max_bytes)
+        return responses[len(calls) - 1]
+
+    monkeypatch.setattr(tiktok, "_check_via_api", no_api)
+    monkeypatch.setattr(tiktok, "_fetch_profile", fetch_profile)
+    return calls
+
+
+def test_partial_page_with_verdict_is_not_refetched(monkeypatch, tiktok):
+    calls = _patch_fetch(monkeypatch, tiktok, [(206, '{"uniqueId":"bob"}', True)])
+
+    result = asyncio.run(tiktok._perform_check("bob"))
+
+    assert result.status is UsernameStatus.TAKEN
+    assert calls == [tiktok.PARTIAL_CONTENT_SIZE]
+
+
+def test_partial_page_without_verdict_is_refetched(monkeypatch, tiktok):
+    calls = _patch_fetch(monkeypatch, tiktok, [
+        (206, "<html>", False),
+        (200, "<html>user not found</html>", False),
+    ])
+
+    result = asyncio.run(tiktok._perform_check("bob"))
+
+    assert result.status is UsernameStatus.AVAILABLE
+    assert calls == [tiktok.PARTIAL_CONTENT_SIZE, None]
+
+
+# === Кэш и объединение одновременных проверок ===
+
+def _patch_check(monkeypatch, tiktok, status=UsernameStatus.TAKEN, delay=0.0):
+    """Подменяет сетевую проверку, возвращает список проверенных юзернеймов."""
+    calls = []
+
+    async def check_with_retry(username):
+        calls.append(username)
+        await asyncio.sleep(delay)
+        return CheckResult(username=username, status=status)
+
+    monkeypatch.setattr(tiktok, "_check_with_retry", check_with_retry)
+    return calls
+
+
+def test_concurrent_checks_are_coalesced(monkeypatch, tiktok):
+    calls = _patch_check(monkeypatch, tiktok, delay=0.01)
+
+    async def run():
+        return await asyncio.gather(
+            tiktok.check_username("Bob"),
+            tiktok.check_username("@bob"),
+            tiktok.check_username("bob"),
+        )
+
+    results = asyncio.run(run())
+
+    assert calls == ["bob"]
+    assert results[0] is results[1] is results[2]
+    assert not tiktok._inflight
+
+
+def test_cancelled_waiter_does_not_cancel_shared_check(monkeypatch, tiktok):
+    calls = _patch_check(monkeypatch, tiktok, delay=0.05)
+
+    async def run():
+        first = asyncio.ensure_future(tiktok.check_username("bob"))
+        second = asyncio.ensure_future(tiktok.check_username("bob"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    result = asyncio.run(run())
+
+    assert result.status is UsernameStatus.TAKEN
+    assert calls == ["bob"]
+
+
+def test_cached_result_expires_after_ttl(monkeypatch, tiktok):
+    calls = _patch_check(monkeypatch, tiktok, status=UsernameStatus.AVAILABLE)
+    now = [1000.0]
+    monkeypatch.setattr(checker.time, "monotonic", lambda: now[0])
+
+    asyncio.run(tiktok.check_username("bob"))
+    asyncio.run(tiktok.check_username("bob"))
+    assert calls == ["bob"]
+
+    now[0] += tiktok.CACHE_TTL[UsernameStatus.AVAILABLE]
+    asyncio.run(tiktok.check_username("bob"))
+    assert calls == ["bob", "bob"]
+
+
+def test_errors_are_not_cached(monkeypatch, tiktok):
+    calls = _patch_check(monkeypatch, tiktok, status=UsernameStatus.ERROR)
+
+    asyncio.run(tiktok.check_username("bob"))
+    asyncio.run(tiktok.check_username("bob"))
+
+    assert calls == ["bob", "bob"]
+
+
+def test_cache_evicts_least_recently_used(monkeypatch, tiktok):
+    calls = _patch_check(monkeypatch, tiktok)
+    monkeypatch.setattr(tiktok, "CACHE_MAX_SIZE", 2)
+
+    async def run():
+        for name in ("aa", "bb", "aa", "cc"):
+            await tiktok.check_username(name)
+
+    asyncio.run(run())
+
+    assert list(tiktok._cache) == ["aa", "cc"]
+    assert calls == ["aa", "bb", "cc"]
+
+
+def test_invalid_username_skips_network(monkeypatch, tiktok):
+    calls = _patch_check(monkeypatch, tiktok)
+
+    result = asyncio.run(tiktok.check_username("bad name!"))
+
+    assert result.status is UsernameStatus.UNAVAILABLE
+    assert calls == []
+
+
+# === Статусы ===
+
+def test_status_values_are_truthy_and_labelled():
+    for status in UsernameStatus:
+        assert status
+        assert status.label == checker.STATUS_LABEL[status]
@@ -0,0 +1,74 @@
+"""Тесты разбора ввода пользователя в боте."""
+
+import io
+
+import pytest
+
+from main import MAX_BULK_COUNT, _normalize_username, _parse_usernames
+
+
+def _parse(data: bytes) -> list[str]:
+    return _parse_usernames(io.BytesIO(data))
+
+
+# === _normalize_username ===
+
+@pytest.mark.parametrize("text, expected", [
+    ("bob", "bob"),
+    ("  @bob  ", "bob"),
+    ("@@bob", "bob"),
+    ("@ bob", "bob"),
+    ("a", None),
+    ("@", None),
+    ("", None),
+    # Строки с пробелом не отбрасываются - их формат отклонит чекер
+    ("foo bar", "foo bar"),
+])
+def test_normalize_username(text, expected):
+    assert _normalize_username(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("@user more words", "user"),
+    ("@ foo", "foo"),
+    ("@@x y", None),
+])
+def test_normalize_username_first_word(text, expected):
+    assert _normalize_username(text, first_word=True) == expected
+
+
+# === _parse_usernames ===
+
+@pytest.mark.parametrize("data", [
+    b"alice\nbob\ncarol",
+    b"alice\r\nbob\r\ncarol\r\n",
+    b"alice\rbob\rcarol",
+])
+def test_parse_usernames_line_endings(data):
+    assert _parse(data) == ["alice", "bob", "carol"]
+
+
+def test_parse_usernames_skips_comments_and_short_lines():
+    assert _parse(b"# comment\n\n  \nx\n@bob\n") == ["bob"]
+
+
+def test_parse_usernames_dedupes_case_insensitively_keeping_order():
+    assert _parse(b"Bob\nalice\n@bob\nBOB\nAlice\n") == ["Bob", "alice"]
+
+
+def test_parse_usernames_keeps_lines_with_spaces():
+    assert _parse(b"foo bar\nbaz\n") == ["foo bar", "baz"]
+
+
+def test_parse_usernames_ignores_undecodable_bytes():
+    assert _parse("привет\n".encode() + b"bo\xffb\n") == ["привет", "bob"]
+
+
+def test_parse_usernames_stops_after_limit():
+    data = "\n".join(f"user{i}" for i in range(MAX_BULK_COUNT * 2)).encode()
+
+    usernames = _parse(data)
+
+    # Одного лишнего юзернейма достаточно, чтобы сообщить о превышении лимита
+    assert len(usernames) == MAX_BULK_COUNT + 1
+    assert usernames[0] == "user0"